@@ -1,65 +1,92 @@
 from flask import Flask, session, redirect, url_for, render_template, request
+from flask_session import Session
+from cachelib import FileSystemCache
 import random
 
 app = Flask(__name__)
 app.secret_key = 'replace-with-a-secure-random-key'
+# Keep game state server-side; the cookie only carries the session id
+app.config['SESSION_TYPE'] = 'cachelib'
+# cachelib prunes the oldest sessions past `threshold` (default 500); size it well above
+# the number of games expected to be in progress at once
+app.config['SESSION_CACHELIB'] = FileSystemCache(cache_dir='flask_session', threshold=10000)
+app.config['SESSION_PERMANENT'] = False  # browser-session cookie, as with Flask's default session
+app.config['SESSION_REFRESH_EACH_REQUEST'] = False  # only rewrite stored sessions that changed
+Session(app)
 
 RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
 SUITS = ['♠', '♥', '♦', '♣']
+_RANK_STR = tuple(RANKS)
+_SUIT_STR = tuple(SUITS)
+_VALUE_BY_IDX = (2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10, 11)
+ACE = 12
+_CARD_STR = tuple(f"{_RANK_STR[i % 13]}{_SUIT_STR[i // 13]}" for i in range(52))
+QUEUE_SIZE = 16  # cards pre-drawn per round; plenty for almost any hand
+
+def card_value(card):
+    return _VALUE_BY_IDX[card % 13]
+
+def new_hand(cards=()):
+    hand = {'cards': bytearray(), 'value': 0, 'aces': 0, 'rendered': ''}
+    for card in cards:
+        add_card(hand, card)
+    return hand
 
-def build_deck(shuffle=True):
-    deck = [(rank, suit) for suit in SUITS for rank in RANKS]
-    if shuffle:
-        random.shuffle(deck)
-    return deck
-
-def card_value(rank):
-    if rank in ('J', 'Q', 'K'):
-        return 10
-    if rank == 'A':
-        return 11
-    return int(rank)
-
-def hand_value(hand):
-    value = 0
-    aces = 0
-    for rank, _ in hand:
-        v = card_value(rank)
-        value += v
-        if rank == 'A':
-            aces += 1
-    while value > 21 and aces > 0:
-        value -= 10
-        aces -= 1
-    return value
-
-def format_card(card):
-    rank, suit = card
-    return f"{rank}{suit}"
+# Cards are stored in the session as bytes (one byte per card) to keep the session small
+def load_hand(data):
+    hand = dict(data, cards=bytearray(data['cards']))
+    if 'rendered' not in hand:
+        hand['rendered'] = format_hand(hand['cards'])
+    return hand
 
-def format_hand(hand):
-    return ' '.join(format_card(c) for c in hand)
+def dump_hand(hand):
+    return dict(hand, cards=bytes(hand['cards']))
 
-def deal_initial_hands(deck):
-    player = [deck.pop(), deck.pop()]
-    dealer = [deck.pop(), deck.pop()]
-    return player, dealer
+def add_card(hand, card):
+    rank = card % 13
+    hand['cards'].append(card)
+    hand['rendered'] += (' ' if hand['rendered'] else '') + _CARD_STR[card]
+    hand['value'] += _VALUE_BY_IDX[rank]
+    hand['aces'] += rank == ACE
+    if hand['value'] > 21:
+        downgrades = min(hand['aces'], (hand['value'] - 21 + 9) // 10)
+        hand['value'] -= 10 * downgrades
+        hand['aces'] -= downgrades
 
-def dealer_turn(deck, hand):
-    while hand_value(hand) <= 16:
-        hand.append(deck.pop())
-    return hand
+format_card = _CARD_STR.__getitem__
 
-def determine_winner(player, dealer):
-    p_val = hand_value(player)
-    d_val = hand_value(dealer)
-    if p_val > 21:
-        return 'dealer'
-    if d_val > 21:
-        return 'player'
-    if p_val > d_val:
-        return 'player'
-    return 'dealer'
+def format_hand(hand):
+    return ' '.join(map(_CARD_STR.__getitem__, hand))
+
+def deal_queue():
+    # A round's cards drawn up front; sampling k cards is distributed like shuffle-then-take-k
+    return bytearray(random.sample(range(52), QUEUE_SIZE))
+
+def draw(queue, qpos):
+    if qpos == len(queue):
+        # Long round: top up with another batch of cards not dealt yet
+        dealt = set(queue)
+        unseen = [c for c in range(52) if c not in dealt]
+        queue.extend(random.sample(unseen, min(QUEUE_SIZE, len(unseen))))
+    return queue[qpos], qpos + 1
+
+def deal_initial_hands(queue, qpos):
+    player = new_hand(queue[qpos:qpos + 2])
+    dealer = new_hand(queue[qpos + 2:qpos + 4])
+    return player, dealer, qpos + 4
+
+def dealer_turn(queue, qpos, hand):
+    while hand['value'] <= 16:
+        card, qpos = draw(queue, qpos)
+        add_card(hand, card)
+    return hand, qpos
+
+# Indexed by determine_winner's result
+_RESULT_MSG = ('Dealer wins! (Dealer wins ties)', 'You win!')
+
+def determine_winner(p_val, d_val):
+    # 1 if the player wins, 0 if the dealer does (dealer wins ties)
+    return int(p_val <= 21 and (d_val > 21 or p_val > d_val))
 
 @app.route('/')
 def index():
@@ -67,54 +94,79 @@ def index():
 
 @app.route('/start')
 def start():
-    deck = build_deck()
-    player, dealer = deal_initial_hands(deck)
-    session['deck'] = deck
-    session['player'] = player
-    session['dealer'] = dealer
+    queue = deal_queue()
+    player, dealer, qpos = deal_initial_hands(queue, 0)
+    session['queue'] = bytes(queue)
+    session['qpos'] = qpos
+    session['player'] = dump_hand(player)
+    session['dealer'] = dump_hand(dealer)
     session['state'] = 'playing'
     return redirect(url_for('game'))
 
 @app.route('/game', methods=['GET', 'POST'])
 def game():
-    deck = session.get('deck')
-    player = session.get('player')
-    dealer = session.get('dealer')
+    if 'player' not in session or 'dealer' not in session:
+        # No game in progress (never started, reset, or the stored session was pruned)
+        return redirect(url_for('index'))
+    queue = session.get('queue')
+    if queue is not None:
+        queue = bytearray(queue)
+    qpos = session.get('qpos')
+    player = load_hand(session.get('player'))
+    dealer = load_hand(session.get('dealer'))
     state = session.get('state', 'playing')
     message = ''
 
+    # Only write back what changed; any session write re-serializes and re-stores the session
+    queue_dirty = player_dirty = dealer_dirty = state_dirty = False
+
     if request.method == 'POST' and state == 'playing':
         action = request.form.get('action')
         if action == 'hit':
-            player.append(deck.pop())
-            if hand_value(player) > 21:
+            card, qpos = draw(queue, qpos)
+            add_card(player, card)
+            queue_dirty = player_dirty = True
+            if player['value'] > 21:
                 state = 'done'
+                state_dirty = True
                 message = 'You busted! Dealer wins.'
         elif action == 'stand':
             state = 'dealer'
-            session['state'] = state
+            state_dirty = True
 
     if state == 'dealer':
-        dealer = dealer_turn(deck, dealer)
-        winner = determine_winner(player, dealer)
+        dealer, qpos = dealer_turn(queue, qpos, dealer)
+        message = _RESULT_MSG[determine_winner(player['value'], dealer['value'])]
         state = 'done'
-        if winner == 'player':
-            message = 'You win!'
-        else:
-            message = 'Dealer wins! (Dealer wins ties)'
-        session['dealer'] = dealer
-        session['state'] = state
+        queue_dirty = dealer_dirty = state_dirty = True
 
-    session['player'] = player
-    session['dealer'] = dealer
-    session['deck'] = deck
-    session['state'] = state
+    if player_dirty:
+        session['player'] = dump_hand(player)
+    if dealer_dirty:
+        session['dealer'] = dump_hand(dealer)
+    if state_dirty:
+        session['state'] = state
+    if state == 'done':
+        # The round is over, so the remaining queued cards are never needed again
+        session.pop('queue', None)
+        session.pop('qpos', None)
+    elif queue_dirty:
+        session['queue'] = bytes(queue)
+        session['qpos'] = qpos
+
+    if state == 'playing':
+        upcard = dealer['cards'][0]
+        dealer_hand = format_card(upcard) + ' [hidden]'
+        dealer_value = card_value(upcard)
+    else:
+        dealer_hand = dealer['rendered']
+        dealer_value = dealer['value']
 
     return render_template('game.html',
-        player_hand=format_hand(player),
-        player_value=hand_value(player),
-        dealer_hand=format_hand([dealer[0]]) + ' [hidden]' if state == 'playing' else format_hand(dealer),
-        dealer_value=hand_value([dealer[0]]) if state == 'playing' else hand_value(dealer),
+        player_hand=player['rendered'],
+        player_value=player['value'],
+        dealer_hand=dealer_hand,
+        dealer_value=dealer_value,
         state=state,
         message=message
     )
@@ -13,84 +13,107 @@ Rules implemented:
 """
 
 import random
-from typing import List, Tuple
+from typing import List, Sequence, Tuple
+
+try:
+    import numpy as np  # only needed for the batched simulation helpers
+except ImportError:
+    np = None
+
+try:
+    from numba import njit  # optional JIT for the simulation helpers
+except ImportError:
+    def njit(*args, **kwargs):
+        return lambda f: f
 
 # Card representation:
-# Each card is a tuple: (rank, suit)
-# rank: '2'..'10', 'J', 'Q', 'K', 'A'
-# suit: '♠', '♥', '♦', '♣'
+# Each card is a small int 0..51
+# rank index: card % 13 -> '2'..'10', 'J', 'Q', 'K', 'A'
+# suit index: card // 13 -> '♠', '♥', '♦', '♣'
+# Decks and hands are bytearrays of cards; the deck is dealt from index `top` downwards.
+# Callers must keep top >= 0 for every card dealt: a negative index would silently wrap
+# around and re-deal cards from the other end. One round never gets close on a fresh deck.
 
 
 RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
 SUITS = ['♠', '♥', '♦', '♣']
 
+_RANK_STR = tuple(RANKS)
+_SUIT_STR = tuple(SUITS)
+ACE = 12  # rank index of the Ace
+
+# Display string for every card, indexed by card number
+_CARD_STR = tuple(f"{_RANK_STR[i % 13]}{_SUIT_STR[i // 13]}" for i in range(52))
 
-def build_deck(shuffle: bool = True) -> List[Tuple[str, str]]:
-    """Create a standard 52-card deck; optionally shuffle it."""
-    deck = [(rank, suit) for suit in SUITS for rank in RANKS]
+# Base value of each rank index (Ace counted as 11; hand_value adjusts aces later)
+_VALUE_BY_IDX = (2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10, 11)
+# Same lookups indexed directly by card number, so hand_value can run on map()/sum() alone
+_VALUE_BY_CARD = tuple(_VALUE_BY_IDX[i % 13] for i in range(52))
+_ACE_BY_CARD = tuple(int(i % 13 == ACE) for i in range(52))
+_VALUE_TABLE = np.array(_VALUE_BY_IDX, dtype=np.int8) if np is not None else None
+
+
+def build_deck(shuffle: bool = True) -> Tuple[bytearray, int]:
+    """Create a standard 52-card deck; optionally shuffle it. Returns (deck, top)."""
+    deck = bytearray(range(52))
     if shuffle:
         random.shuffle(deck)
-    return deck
+    return deck, len(deck) - 1
 
 
-def card_value(rank: str) -> int:
-    """Return the base value of a single card rank (Ace treated as 11 here; we adjust later)."""
-    if rank in ('J', 'Q', 'K'):
-        return 10
-    if rank == 'A':
-        return 11  # we'll adjust for aces later
-    return int(rank)
+def card_value(card: int) -> int:
+    """Return the base value of a single card (Ace treated as 11 here; we adjust later)."""
+    return _VALUE_BY_IDX[card % 13]
 
 
-def hand_value(hand: List[Tuple[str, str]]) -> int:
+def hand_value(hand: Sequence[int]) -> int:
     """
     Compute the best value of a Blackjack hand.
     Aces are initially counted as 11; we lower them to 1 as needed to avoid busting.
     """
-    value = 0
-    aces = 0
-    for rank, _ in hand:
-        v = card_value(rank)
-        value += v
-        if rank == 'A':
-            aces += 1
+    value = sum(map(_VALUE_BY_CARD.__getitem__, hand))
+    aces = sum(map(_ACE_BY_CARD.__getitem__, hand))
 
-    # If we're over 21 and have aces counted as 11, convert them (11 -> 1) one by one
-    while value > 21 and aces > 0:
-        value -= 10  # change one Ace from 11 to 1
-        aces -= 1
+    # If we're over 21, convert just enough aces (11 -> 1) to get back under,
+    # i.e. ceil((value - 21) / 10) of them, but never more than we hold
+    if value > 21:
+        value -= 10 * min(aces, (value - 21 + 9) // 10)
 
     return value
 
 
-def format_card(card: Tuple[str, str]) -> str:
+def format_card(card: int) -> str:
     """Return a user-friendly string for a single card, e.g., 'A♠' or '10♥'."""
-    rank, suit = card
-    return f"{rank}{suit}"
+    return _CARD_STR[card]
 
 
-def format_hand(hand: List[Tuple[str, str]]) -> str:
+def format_hand(hand: Sequence[int]) -> str:
     """Return a user-friendly string for a list of cards."""
-    return ' '.join(format_card(c) for c in hand)
+    return ' '.join(map(_CARD_STR.__getitem__, hand))
 
 
-def deal_initial_hands(deck: List[Tuple[str, str]]):
-    """Deal two cards to player and dealer (dealer's second card is 'hidden')."""
-    player = [deck.pop(), deck.pop()]
-    dealer = [deck.pop(), deck.pop()]
-    return player, dealer
+def deal_initial_hands(deck: bytearray, top: int) -> Tuple[bytearray, bytearray, int]:
+    """
+    Deal two cards to player and dealer (dealer's second card is 'hidden').
+    Requires top >= 3.
+    """
+    player = bytearray((deck[top], deck[top - 1]))
+    dealer = bytearray((deck[top - 2], deck[top - 3]))
+    return player, dealer, top - 4
 
 
-def player_turn(deck: List[Tuple[str, str]], hand: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+def player_turn(deck: bytearray, top: int, hand: bytearray) -> Tuple[bytearray, int]:
     """
     Player chooses to Hit or Stand.
-    Returns the final player hand.
+    Returns the final player hand and the new deck top.
+    Each hit deals deck[top], so top must be >= 0 whenever the player hits.
     """
     while True:
         print(f"\nYour hand: {format_hand(hand)} (value: {hand_value(hand)})")
         choice = input("Hit or Stand? [H/S]: ").strip().lower()
         if choice in ('h', 'hit'):
-            hand.append(deck.pop())
+            hand.append(deck[top])
+            top -= 1
             value = hand_value(hand)
             print(f"You drew: {format_card(hand[-1])}. Hand value is now {value}.")
             if value > 21:
@@ -100,19 +123,21 @@ def player_turn(deck: List[Tuple[str, str]], hand: List[Tuple[str, str]]) -> Lis
             break
         else:
             print("Please type 'H' to Hit or 'S' to Stand.")
-    return hand
+    return hand, top
 
 
-def dealer_turn(deck: List[Tuple[str, str]], hand: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+def dealer_turn(deck: bytearray, top: int, hand: bytearray) -> Tuple[bytearray, int]:
     """
     Dealer must hit on 16 or less, stand on 17+.
-    Returns the final dealer hand.
+    Returns the final dealer hand and the new deck top.
+    Each hit deals deck[top], so top must be >= 0 whenever the dealer hits.
     """
     print(f"\nDealer reveals hole card: {format_card(hand[1])}")
     print(f"Dealer's hand: {format_hand(hand)} (value: {hand_value(hand)})")
 
     while hand_value(hand) <= 16:
-        drawn = deck.pop()
+        drawn = deck[top]
+        top -= 1
         hand.append(drawn)
         print(f"Dealer hits and draws: {format_card(drawn)}")
         print(f"Dealer's hand: {format_hand(hand)} (value: {hand_value(hand)})")
@@ -121,32 +146,206 @@ def dealer_turn(deck: List[Tuple[str, str]], hand: List[Tuple[str, str]]) -> Lis
         print("Dealer busts!")
     else:
         print("Dealer stands.")
-    return hand
+    return hand, top
+
 
+# Result messages, indexed by determine_winner's return value
+_RESULT_MSG = ("Dealer wins! (Dealer wins ties)", "You win!")
 
-def determine_winner(player: List[Tuple[str, str]], dealer: List[Tuple[str, str]]) -> str:
+
+def determine_winner(p_val: int, d_val: int) -> int:
     """
-    Determine the outcome according to rules:
+    Determine the outcome from the two hand values according to rules:
     - Dealer wins all ties.
-    Returns 'player', 'dealer', or 'push' (push will not occur due to 'dealer wins ties' rule).
+    Returns 1 if the player wins, 0 if the dealer wins (there is no push).
     """
-    p_val = hand_value(player)
-    d_val = hand_value(dealer)
+    return int(p_val <= 21 and (d_val > 21 or p_val > d_val))
+
+
+# --- Simulation helpers (not used by the console game) ---
+
+
+def hand_value_batch(ranks: "np.ndarray") -> "np.ndarray":
+    """
+    Compute hand_value for many hands at once.
+    `ranks` is an (N, max_cards) int8 array of rank indices (card % 13), padded with -1.
+    Returns an (N,) array of hand values.
+    """
+    if np is None:
+        raise ImportError("hand_value_batch requires NumPy")
+    vals = np.where(ranks < 0, 0, _VALUE_TABLE[ranks]).sum(axis=1)
+    aces = (ranks == ACE).sum(axis=1)
+    # Same closed-form ace downgrade as hand_value, applied per row
+    downgrades = np.minimum(aces, np.maximum(0, (vals - 21 + 9) // 10))
+    return vals - 10 * downgrades
+
+
+@njit(cache=True)
+def _hand_value_nb(cards):
+    """hand_value for an int array of cards (0..51); JIT-compiled when Numba is available."""
+    value = 0
+    aces = 0
+    for c in cards:
+        r = c % 13
+        value += _VALUE_BY_IDX[r]
+        if r == ACE:
+            aces += 1
+    if value > 21:
+        value -= 10 * min(aces, (value - 21 + 9) // 10)
+    return value
+
+
+@njit(cache=True)
+def _dealer_turn_nb(top, deck, hand_buf, hand_len):
+    """
+    Silent dealer_turn on preallocated buffers.
+    Draws deck[top], deck[top - 1], ... into hand_buf[hand_len:] while the hand is 16 or less.
+    Returns the new (top, hand_len); raises IndexError if the deck runs out first.
+    """
+    while _hand_value_nb(hand_buf[:hand_len]) <= 16:
+        if top < 0:
+            raise IndexError("deck is exhausted")
+        hand_buf[hand_len] = deck[top]
+        hand_len += 1
+        top -= 1
+    return top, hand_len
+
+
+# Dealer outcome cache for EV / Monte-Carlo drivers built on this module.
+# Cards are grouped into 10 value classes (class = value - 2, so the Ace is class 9).
+# Any composition a driver asks about is a full shoe minus a multiset of removed cards
+# (upcard, player cards, dealer draws, earlier rounds), and the dealer's outcome depends only
+# on that multiset plus the dealer's current total and soft aces. Rows are keyed by exactly
+# that, with the multiset as per-class counts, so one table per shoe size serves every
+# composition drawn from it and compositions that differ by a card share rows.
+
+_DEALER_CACHE = {}  # decks -> {(removed per class, total, soft aces): (P(17), .., P(21), P(bust))}
+_DEALER_CACHE_MAX_ROWS = 1 << 20  # a table is cleared rather than grown past this
+
+
+def _shoe_classes(decks: int) -> List[int]:
+    """Cards of each value class in a full shoe of `decks` decks."""
+    return [4 * decks] * 8 + [16 * decks, 4 * decks]
+
+
+def _dealer_expand(rows, shoe, removed, remaining, value, aces):
+    """Fill (or fetch) the outcome row for a dealer at (value, aces) with `removed` out of the shoe."""
+    key = (tuple(removed), value, aces)
+    row = rows.get(key)
+    if row is not None:
+        return row
+    out = [0.0] * 6
+    for c in range(10):
+        n = shoe[c] - removed[c]
+        if n <= 0:
+            continue
+        p = n / remaining
+        v = value + c + 2
+        a = aces + (c == 9)
+        if v > 21 and a:
+            v -= 10
+            a -= 1
+        if v >= 17:
+            out[v - 17 if v <= 21 else 5] += p
+        else:
+            removed[c] += 1
+            sub = _dealer_expand(rows, shoe, removed, remaining - 1, v, a)
+            removed[c] -= 1
+            for k in range(6):
+                out[k] += p * sub[k]
+    row = rows[key] = tuple(out)
+    return row
+
+
+def dealer_outcome(deck_counts: Sequence[int], upcard: int, decks: int = 1) -> Tuple[float, ...]:
+    """
+    Probabilities of the dealer finishing on 17, 18, 19, 20, 21 or busting.
+    `deck_counts` holds the number of unseen cards of each rank index (13 entries, upcard
+    already removed) out of a shoe of `decks` decks; `upcard` is the rank index of the
+    dealer's face-up card. Results are cached per shoe, so repeated and overlapping
+    queries are mostly table lookups.
+    """
+    shoe = _shoe_classes(decks)
+    counts = [0] * 10
+    for r, n in enumerate(deck_counts):
+        counts[_VALUE_BY_IDX[r] - 2] += n
+    removed = [s - n for s, n in zip(shoe, counts)]
+    if min(removed) < 0:
+        raise ValueError(f"deck_counts holds more cards than a {decks}-deck shoe")
+    rows = _DEALER_CACHE.setdefault(decks, {})
+    if len(rows) > _DEALER_CACHE_MAX_ROWS:
+        rows.clear()
+    up = _VALUE_BY_IDX[upcard] - 2
+    return _dealer_expand(rows, shoe, removed, sum(counts), up + 2, int(up == 9))
+
+
+# Dealer play specialized per (best total, soft) state for simulation drivers.
+# Every state gets its own generated function whose only work is to look up the next
+# state's function by the card on top of the deck; all total/ace bookkeeping is done
+# once here, when the transition tables are built.
+
+def _dealer_state_name(total: int, soft: bool) -> str:
+    return f"_dealer_{'s' if soft else 'h'}{total}"
+
+
+def _dealer_next_state(total: int, soft: bool, card: int) -> Tuple[int, bool]:
+    """State reached from (total, soft) after drawing `card`."""
+    hard = total - 10 if soft else total
+    hard += 1 if card % 13 == ACE else _VALUE_BY_IDX[card % 13]
+    soft = (soft or card % 13 == ACE) and hard + 10 <= 21
+    return (hard + 10 if soft else hard), soft
+
+
+def _build_dealer_specialized():
+    # Hard 2..16 and soft 11..16 must hit; hard 17..26 and soft 17..21 are final
+    states = [(t, False) for t in range(2, 27)] + [(t, True) for t in range(11, 22)]
+    src = []
+    for total, soft in states:
+        name = _dealer_state_name(total, soft)
+        if total >= 17:
+            src.append(f"def {name}(deck, top):\n    return {total}, top\n")
+        else:
+            src.append(f"def {name}(deck, top):\n    return {name}_next[deck[top]](deck, top - 1)\n")
+    ns = {}
+    exec("\n".join(src), ns)
+    for total, soft in states:
+        if total < 17:
+            ns[_dealer_state_name(total, soft) + "_next"] = tuple(
+                ns[_dealer_state_name(*_dealer_next_state(total, soft, card))] for card in range(52))
+    return {state: ns[_dealer_state_name(*state)] for state in states}
+
+
+_DEALER_SPECIALIZED = _build_dealer_specialized()
+_DEALER_LONGEST_DRAW = 11  # most cards any specialized dealer function can take (from a lone Ace)
 
-    if p_val > 21:
-        return 'dealer'
-    if d_val > 21:
-        return 'player'
-    if p_val > d_val:
-        return 'player'
-    # dealer wins ties and when d_val > p_val
-    return 'dealer'
+
+def dealer_total(deck: bytearray, top: int, hand: Sequence[int]) -> Tuple[int, int]:
+    """
+    Silent dealer_turn for simulations: play out `hand` from deck[top] downwards.
+    Returns the dealer's final total (over 21 means bust) and the new deck top.
+    Raises IndexError if the deck runs out (top would go below 0) before the dealer stands.
+    """
+    hard = sum(1 if c % 13 == ACE else _VALUE_BY_IDX[c % 13] for c in hand)
+    soft = hard + 10 <= 21 and any(c % 13 == ACE for c in hand)
+    total = hard + 10 if soft else hard
+    if total >= 17:
+        return total, top
+    if top >= _DEALER_LONGEST_DRAW - 1:
+        return _DEALER_SPECIALIZED[(total, soft)](deck, top)
+    # Too close to the bottom for the unchecked fast path, where deck[-1] would wrap around
+    hand = bytearray(hand)
+    while hand_value(hand) <= 16:
+        if top < 0:
+            raise IndexError("deck is exhausted")
+        hand.append(deck[top])
+        top -= 1
+    return hand_value(hand), top
 
 
 def play_round() -> None:
     """Play a single round of Blackjack."""
-    deck = build_deck(shuffle=True)
-    player, dealer = deal_initial_hands(deck)
+    deck, top = build_deck(shuffle=True)
+    player, dealer, top = deal_initial_hands(deck, top)
 
     # Show initial hands (dealer shows only one card)
     print("\n=== New Round ===")
@@ -154,7 +353,7 @@ def play_round() -> None:
     print(f"Your hand: {format_hand(player)} (value: {hand_value(player)})")
 
     # Player turn
-    player = player_turn(deck, player)
+    player, top = player_turn(deck, top, player)
 
     # If player busts, dealer wins immediately
     if hand_value(player) > 21:
@@ -163,21 +362,17 @@ def play_round() -> None:
         return
 
     # Dealer turn
-    dealer = dealer_turn(deck, dealer)
+    dealer, top = dealer_turn(deck, top, dealer)
 
     # Determine outcome
-    result = determine_winner(player, dealer)
+    p_val = hand_value(player)
+    d_val = hand_value(dealer)
+    result = determine_winner(p_val, d_val)
 
     print("\n=== Results ===")
-    print(f"Your hand:   {format_hand(player)} (value: {hand_value(player)})")
-    print(f"Dealer hand: {format_hand(dealer)} (value: {hand_value(dealer)})")
-
-    if result == 'player':
-        print("You win!")
-    elif result == 'dealer':
-        print("Dealer wins! (Dealer wins ties)")
-    else:
-        print("Push (tie).")  # Should not occur with 'dealer wins ties', kept for completeness.
+    print(f"Your hand:   {format_hand(player)} (value: {p_val})")
+    print(f"Dealer hand: {format_hand(dealer)} (value: {d_val})")
+    print(_RESULT_MSG[result])
 
 
 def main():
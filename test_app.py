@@ -0,0 +1,87 @@
+import pytest
+from cachelib import SimpleCache
+
+import app
+
+
+class CountingCache(SimpleCache):
+    """In-memory session store that counts writes."""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def set(self, *args, **kwargs):
+        self.writes += 1
+        return super().set(*args, **kwargs)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    cache = CountingCache()
+    monkeypatch.setattr(app.app.session_interface, 'cache', cache)
+    app.app.config['TESTING'] = True
+    with app.app.test_client() as c:
+        c.cache = cache
+        yield c
+
+
+def play_round(client, action):
+    client.get('/start')
+    r = client.get('/game')
+    while b'name="action"' in r.data:
+        r = client.post('/game', data={'action': action})
+    return r
+
+
+def test_round_finishes_with_a_result(client):
+    for action in ('hit', 'stand'):
+        r = play_round(client, action)
+        assert r.status_code == 200
+        assert any(msg.encode() in r.data for msg in ('You busted!', 'You win!', 'Dealer wins!'))
+
+
+def test_idle_get_does_not_rewrite_session(client):
+    client.get('/start')
+    client.get('/game')
+    before = client.cache.writes
+    client.get('/game')
+    assert client.cache.writes == before
+
+    client.post('/game', data={'action': 'stand'})
+    before = client.cache.writes
+    client.get('/game')
+    # Once the round is done, further actions change nothing either
+    client.post('/game', data={'action': 'hit'})
+    assert client.cache.writes == before
+
+
+def test_finished_round_drops_queue(client):
+    play_round(client, 'stand')
+    with client.session_transaction() as sess:
+        assert 'queue' not in sess and 'qpos' not in sess
+        assert sess['state'] == 'done'
+
+
+def test_game_without_a_session_redirects_home(client):
+    r = client.get('/game')
+    assert r.status_code == 302
+    assert r.headers['Location'].endswith('/')
+
+
+def test_game_with_a_pruned_session_redirects_home(client):
+    client.get('/start')
+    client.cache.clear()
+    r = client.get('/game')
+    assert r.status_code == 302
+    assert r.headers['Location'].endswith('/')
+
+
+def test_draw_tops_up_an_exhausted_queue_with_unseen_cards():
+    queue = bytearray(range(16))
+    card, qpos = app.draw(queue, 16)
+    assert qpos == 17
+    assert len(queue) > 16
+    assert card == queue[16]
+    assert len(set(queue)) == len(queue)
+    assert all(c >= 16 for c in queue[16:])
@@ -0,0 +1,169 @@
+import itertools
+import random
+from functools import lru_cache
+
+import pytest
+
+import blackjack
+
+
+def hand_value_loop(hand):
+    """hand_value as originally written: downgrade aces one at a time."""
+    value = sum(blackjack._VALUE_BY_IDX[c % 13] for c in hand)
+    aces = sum(1 for c in hand if c % 13 == blackjack.ACE)
+    while value > 21 and aces > 0:
+        value -= 10
+        aces -= 1
+    return value
+
+
+def test_hand_value_matches_ace_loop():
+    # Every hand of up to 11 cards, by value: 2..9 and Ace up to 4 each, ten-valued up to 16
+    ranks = [0, 1, 2, 3, 4, 5, 6, 7, 8, blackjack.ACE]
+    limit = {r: 4 for r in ranks}
+    limit[8] = 16
+    for size in range(12):
+        for hand in itertools.combinations_with_replacement(ranks, size):
+            if any(hand.count(r) > limit[r] for r in set(hand)):
+                continue
+            assert blackjack.hand_value(hand) == hand_value_loop(hand), hand
+
+
+def dealer_outcome_exact(deck_counts, upcard):
+    """Plain memoized recursion over the remaining composition, scoring hands with hand_value."""
+    @lru_cache(maxsize=None)
+    def expand(counts, hand):
+        value = blackjack.hand_value(hand)
+        if value >= 17:
+            out = [0.0] * 6
+            out[value - 17 if value <= 21 else 5] = 1.0
+            return out
+        out = [0.0] * 6
+        remaining = sum(counts)
+        for r, n in enumerate(counts):
+            if n:
+                rest = list(counts)
+                rest[r] -= 1
+                for k, q in enumerate(expand(tuple(rest), tuple(sorted(hand + (r,))))):
+                    out[k] += n / remaining * q
+        return out
+
+    # Fold J/Q/K into the 10 so equivalent compositions share entries
+    counts = list(deck_counts)
+    counts[8] += counts[9] + counts[10] + counts[11]
+    counts[9] = counts[10] = counts[11] = 0
+    return expand(tuple(counts), (8 if upcard in (9, 10, 11) else upcard,))
+
+
+@pytest.mark.parametrize('upcard', range(13))
+def test_dealer_outcome_matches_exact_recursion(upcard):
+    rng = random.Random(upcard)
+    for decks in (1, 2):
+        counts = [4 * decks] * 13
+        counts[upcard] -= 1
+        # Full shoe, then the same shoe with a few player cards removed
+        for _ in range(4):
+            probs = blackjack.dealer_outcome(counts, upcard, decks)
+            assert probs == pytest.approx(dealer_outcome_exact(counts, upcard), abs=1e-12)
+            assert sum(probs) == pytest.approx(1.0)
+            counts[rng.choice([r for r in range(13) if counts[r]])] -= 1
+
+
+def test_dealer_outcome_rejects_counts_beyond_the_shoe():
+    with pytest.raises(ValueError):
+        blackjack.dealer_outcome([5] * 13, 0)
+
+
+def test_dealer_total_matches_hand_value_loop():
+    rng = random.Random(21)
+    for _ in range(20000):
+        deck = bytearray(rng.sample(range(52), 52))
+        top = len(deck) - 1
+        start = rng.randint(1, 3)
+        hand = deck[top - start + 1:]
+        top -= start
+
+        expected_hand, expected_top = bytearray(hand), top
+        while blackjack.hand_value(expected_hand) <= 16:
+            expected_hand.append(deck[expected_top])
+            expected_top -= 1
+
+        assert blackjack.dealer_total(deck, top, hand) == (blackjack.hand_value(expected_hand), expected_top)
+
+
+def test_dealer_total_near_the_bottom_of_the_deck():
+    rng = random.Random(210)
+    for _ in range(5000):
+        deck = bytearray(rng.sample(range(52), rng.randint(0, 12)))
+        hand = bytearray(rng.sample([c for c in range(52) if c not in deck], 1))
+        top = len(deck) - 1
+
+        expected_hand, expected_top = bytearray(hand), top
+        while blackjack.hand_value(expected_hand) <= 16 and expected_top >= 0:
+            expected_hand.append(deck[expected_top])
+            expected_top -= 1
+
+        if blackjack.hand_value(expected_hand) <= 16:
+            # The deck ran out before the dealer could stand
+            with pytest.raises(IndexError):
+                blackjack.dealer_total(deck, top, hand)
+        else:
+            assert blackjack.dealer_total(deck, top, hand) == (blackjack.hand_value(expected_hand), expected_top)
+
+
+def kernel_variants(kernel):
+    """The kernel as used, plus its plain-Python body when Numba compiled it."""
+    variants = [kernel]
+    if hasattr(kernel, 'py_func'):
+        variants.append(kernel.py_func)
+    return variants
+
+
+def int8_buffer(cards):
+    """Card buffer in the form the kernels expect: int8 array with NumPy, bytearray without."""
+    if blackjack.np is not None:
+        return blackjack.np.array(cards, dtype=blackjack.np.int8)
+    return bytearray(cards)
+
+
+@pytest.mark.parametrize('hand_value_nb', kernel_variants(blackjack._hand_value_nb))
+def test_hand_value_nb_matches_hand_value(hand_value_nb):
+    rng = random.Random(7)
+    for _ in range(2000):
+        hand = rng.sample(range(52), rng.randint(0, 11))
+        assert hand_value_nb(int8_buffer(hand)) == blackjack.hand_value(hand)
+
+
+@pytest.mark.parametrize('dealer_turn_nb', kernel_variants(blackjack._dealer_turn_nb))
+def test_dealer_turn_nb_matches_dealer_total(dealer_turn_nb):
+    rng = random.Random(7)
+    for _ in range(2000):
+        cards = rng.sample(range(52), 52)
+        top = len(cards) - 1
+        start = rng.randint(1, 3)
+        hand = cards[top - start + 1:]
+        top -= start
+
+        expected = blackjack.dealer_total(bytearray(cards), top, hand)
+        hand_buf = int8_buffer(hand + [0] * 11)
+        new_top, hand_len = dealer_turn_nb(top, int8_buffer(cards), hand_buf, start)
+        assert (blackjack.hand_value(list(hand_buf[:hand_len])), new_top) == expected
+
+
+@pytest.mark.parametrize('dealer_turn_nb', kernel_variants(blackjack._dealer_turn_nb))
+def test_dealer_turn_nb_raises_when_the_deck_runs_out(dealer_turn_nb):
+    # 2 + 2 + 3 = 7: the dealer must hit, but only two cards are left
+    deck = int8_buffer([1, 0])
+    hand_buf = int8_buffer([0] + [0] * 11)
+    with pytest.raises(IndexError):
+        dealer_turn_nb(1, deck, hand_buf, 1)
+
+
+def test_hand_value_batch_matches_hand_value():
+    np = pytest.importorskip('numpy')
+    rng = random.Random(6)
+    hands = [[]] + [rng.sample(range(52), rng.randint(1, 11)) for _ in range(2000)]
+    ranks = np.full((len(hands), 11), -1, dtype=np.int8)
+    for row, hand in zip(ranks, hands):
+        row[:len(hand)] = [c % 13 for c in hand]
+    assert blackjack.hand_value_batch(ranks).tolist() == [blackjack.hand_value(h) for h in hands]